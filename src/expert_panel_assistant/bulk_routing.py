@@ -0,0 +1,201 @@
+"""
+Routing-only bulk mode for retrospective analysis of large email corpora.
+
+Answers "which experts would this mail have hit?" without any LLM calls.
+The JSONL corpus is memory-mapped and split into newline-aligned byte
+ranges; a process pool routes each shard independently, and the parent
+aggregates per-expert counts and score histograms. Each email is scored on
+its full text, exactly as the live panel routes it (simple_content_routing).
+
+Results are written as columns, one file per field, in corpus order:
+- offset.u64          byte offset of each email in the corpus (little-endian uint64)
+- id.txt              email id, one per line (empty when the corpus line has none)
+- score_<expert>.u8   keyword score per expert (uint8)
+- selected.u8         bitmask of routed experts, bit i = routing.EXPERT_NAMES[i] (uint8)
+- meta.json           row count, column schema and the aggregated summary
+
+Numeric columns can be loaded with e.g. numpy.fromfile(path, dtype="<u8").
+Like the worker pool, this module does not import crewai.
+"""
+import json
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+from array import array
+from multiprocessing import Pool
+from typing import Any, Dict, List, Optional, Tuple
+
+from expert_panel_assistant.corpus import parse_corpus_line
+from expert_panel_assistant.routing import (
+    DEFAULT_EXPERTS,
+    EXPERT_KEYWORDS,
+    EXPERT_NAMES,
+    score_experts,
+    select_experts,
+)
+
+# Shards per worker, so a slow shard does not leave the other cores idle
+SHARDS_PER_WORKER = 4
+MIN_SHARD_BYTES = 1 << 20
+
+_EXPERT_BITS = {expert: 1 << i for i, expert in enumerate(EXPERT_NAMES)}
+_DEFAULT_MASK = sum(_EXPERT_BITS[expert] for expert in DEFAULT_EXPERTS)
+
+
+def _column_files() -> List[str]:
+    return ["offset.u64", "id.txt", "selected.u8"] + [f"score_{expert}.u8" for expert in EXPERT_NAMES]
+
+
+def shard_ranges(path: str, n_shards: int) -> List[Tuple[int, int]]:
+    """Split a file into at most n_shards byte ranges that each start at a line boundary."""
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        boundaries = [0]
+        for i in range(1, n_shards):
+            newline = mm.find(b"\n", max(size * i // n_shards, boundaries[-1]))
+            if newline == -1:
+                break
+            if newline + 1 < size and newline + 1 > boundaries[-1]:
+                boundaries.append(newline + 1)
+        boundaries.append(size)
+
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def route_shard(args: Tuple[str, int, int, str]) -> Dict[str, Any]:
+    """
+    Route every email in one byte range of the corpus (runs in a worker process).
+    Column data is written to shard_dir; the returned dict holds the shard's aggregates.
+    """
+    path, start, end, shard_dir = args
+    os.makedirs(shard_dir, exist_ok=True)
+
+    offsets = array("Q")
+    selected = array("B")
+    scores = {expert: array("B") for expert in EXPERT_NAMES}
+    histograms = {expert: [0] * (len(EXPERT_KEYWORDS[expert]) + 1) for expert in EXPERT_NAMES}
+    counts = {expert: 0 for expert in EXPERT_NAMES}
+    defaulted = 0
+    errors = 0
+
+    with open(path, "rb") as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+            open(os.path.join(shard_dir, "id.txt"), "w", encoding="utf-8") as ids:
+        position = start
+        while position < end:
+            line_end = mm.find(b"\n", position, end)
+            if line_end == -1:
+                line_end = end
+            line = mm[position:line_end]
+            offset, position = position, line_end + 1
+
+            if not line.strip():
+                continue
+            try:
+                record = parse_corpus_line(line.decode("utf-8"), "")
+            except (UnicodeDecodeError, ValueError, AttributeError):
+                errors += 1
+                continue
+
+            expert_scores = score_experts(record["email"])
+            experts = select_experts(expert_scores)
+            if experts:
+                mask = sum(_EXPERT_BITS[expert] for expert in experts)
+            else:
+                experts, mask = DEFAULT_EXPERTS, _DEFAULT_MASK
+                defaulted += 1
+
+            offsets.append(offset)
+            selected.append(mask)
+            ids.write(" ".join(record["id"].split()) + "\n")
+            for expert in EXPERT_NAMES:
+                scores[expert].append(expert_scores[expert])
+                histograms[expert][expert_scores[expert]] += 1
+            for expert in experts:
+                counts[expert] += 1
+
+    with open(os.path.join(shard_dir, "offset.u64"), "wb") as f:
+        _to_little_endian(offsets).tofile(f)
+    with open(os.path.join(shard_dir, "selected.u8"), "wb") as f:
+        selected.tofile(f)
+    for expert in EXPERT_NAMES:
+        with open(os.path.join(shard_dir, f"score_{expert}.u8"), "wb") as f:
+            scores[expert].tofile(f)
+
+    return {
+        "rows": len(offsets),
+        "counts": counts,
+        "histograms": histograms,
+        "defaulted": defaulted,
+        "errors": errors,
+    }
+
+
+def _to_little_endian(values: array) -> array:
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def run_bulk_routing(path: str, output_dir: str, workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Route every email in a JSONL corpus across a process pool and write columnar results.
+    Returns the aggregated summary (also saved in output_dir/meta.json).
+    """
+    workers = workers or os.cpu_count() or 1
+    size = os.path.getsize(path)
+    n_shards = max(1, min(workers * SHARDS_PER_WORKER, size // MIN_SHARD_BYTES + 1))
+    ranges = shard_ranges(path, n_shards)
+
+    summary: Dict[str, Any] = {
+        "rows": 0,
+        "defaulted": 0,
+        "errors": 0,
+        "counts": {expert: 0 for expert in EXPERT_NAMES},
+        "histograms": {expert: [0] * (len(EXPERT_KEYWORDS[expert]) + 1) for expert in EXPERT_NAMES},
+    }
+
+    os.makedirs(output_dir, exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix=".shards-", dir=output_dir)
+    try:
+        tasks = [(path, start, end, os.path.join(work_dir, f"{i:05d}")) for i, (start, end) in enumerate(ranges)]
+        with Pool(processes=min(workers, max(len(tasks), 1))) as pool:
+            for shard in pool.imap_unordered(route_shard, tasks):
+                summary["rows"] += shard["rows"]
+                summary["defaulted"] += shard["defaulted"]
+                summary["errors"] += shard["errors"]
+                for expert in EXPERT_NAMES:
+                    summary["counts"][expert] += shard["counts"][expert]
+                    for score, count in enumerate(shard["histograms"][expert]):
+                        summary["histograms"][expert][score] += count
+
+        # Concatenate shard columns in corpus order
+        for column in _column_files():
+            with open(os.path.join(output_dir, column), "wb") as out:
+                for _, _, _, shard_dir in tasks:
+                    with open(os.path.join(shard_dir, column), "rb") as part:
+                        shutil.copyfileobj(part, out)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    meta = {
+        "source": os.path.abspath(path),
+        "rows": summary["rows"],
+        "experts": EXPERT_NAMES,
+        "columns": {
+            "offset.u64": "<u8",
+            "id.txt": "utf-8 lines",
+            "selected.u8": "u1 bitmask",
+            **{f"score_{expert}.u8": "u1" for expert in EXPERT_NAMES},
+        },
+        "summary": summary,
+    }
+    with open(os.path.join(output_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    return summary
@@ -0,0 +1,120 @@
+"""
+Durable, task-level checkpoints for batch runs of the Expert Panel Assistant.
+
+Every completed assessment, response, synthesis, executive summary and
+quality review is appended to a JSONL log as soon as it finishes. A restarted
+batch reads the log back, skips emails that are done and skips finished
+tasks within emails that were in flight.
+"""
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+DEFAULT_CHECKPOINT_PATH = "panel_checkpoints.jsonl"
+
+# Stages recorded per expert; all other stages are recorded once per email
+EXPERT_STAGES = ("assessment", "response")
+EMAIL_STAGES = ("synthesis_mode", "synthesis", "summary", "review", "done")
+
+
+@dataclass
+class EmailProgress:
+    """Checkpointed task outputs for one email."""
+    synthesis_mode: Optional[str] = None
+    assessments: Dict[str, str] = field(default_factory=dict)
+    responses: Dict[str, str] = field(default_factory=dict)
+    synthesis: Optional[str] = None
+    summary: Optional[str] = None
+    review: Optional[str] = None
+    done: Optional[str] = None
+
+    def apply(self, stage: str, output: str, expert: Optional[str] = None) -> None:
+        """Apply one checkpoint entry to this email's progress."""
+        if stage == "assessment":
+            self.assessments[expert] = output
+        elif stage == "response":
+            self.responses[expert] = output
+        elif stage in EMAIL_STAGES:
+            setattr(self, stage, output)
+
+
+class CheckpointLog:
+    """
+    Append-only JSONL checkpoint log.
+    Each entry is flushed and fsynced as soon as it is recorded, so a crash
+    loses at most the task that was running. A truncated last line left by a
+    crash mid-write is ignored on load.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("CHECKPOINT_PATH", DEFAULT_CHECKPOINT_PATH)
+        self.emails: Dict[str, EmailProgress] = {}
+        self._truncated_tail = False
+        self.load()
+
+    def load(self) -> None:
+        """Replay the log into per-email progress."""
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                self._truncated_tail = not line.endswith("\n")
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self.progress(entry["email_id"]).apply(entry["stage"], entry["output"], entry.get("expert"))
+
+    def progress(self, email_id: str) -> EmailProgress:
+        """Get the checkpointed progress for an email, empty if it was never started."""
+        return self.emails.setdefault(email_id, EmailProgress())
+
+    def is_done(self, email_id: str) -> bool:
+        return email_id in self.emails and self.emails[email_id].done is not None
+
+    def record(self, email_id: str, stage: str, output: str, expert: Optional[str] = None) -> None:
+        """Durably append one completed task output to the log."""
+        if stage not in EXPERT_STAGES + EMAIL_STAGES:
+            raise ValueError(f"Unknown checkpoint stage: {stage}")
+
+        entry = {
+            "email_id": email_id,
+            "stage": stage,
+            "expert": expert,
+            "output": str(output),
+            "timestamp": datetime.now().isoformat(),
+        }
+        with open(self.path, "a", encoding="utf-8") as f:
+            if self._truncated_tail:
+                # Terminate the partial line a crash left behind so this entry stays parseable
+                f.write("\n")
+                self._truncated_tail = False
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.progress(email_id).apply(stage, entry["output"], expert)
+
+    def mode_conflicts(self, synthesis_mode: str) -> Dict[str, str]:
+        """
+        Unfinished emails that were started under a different synthesis mode,
+        mapped to that mode. Resuming them would mix structured and free-form
+        expert responses in one reply.
+        """
+        return {
+            email_id: progress.synthesis_mode
+            for email_id, progress in self.emails.items()
+            if progress.done is None and progress.synthesis_mode not in (None, synthesis_mode)
+        }
+
+    def recorder(self, email_id: str) -> Callable[[str, Optional[str], str], None]:
+        """
+        Build an on_task_complete callback for ExpertPanelAssistant.create_dynamic_crew
+        that checkpoints task outputs under email_id.
+        """
+        def on_task_complete(stage: str, expert: Optional[str], output: str) -> None:
+            self.record(email_id, stage, output, expert)
+        return on_task_complete
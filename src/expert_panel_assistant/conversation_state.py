@@ -0,0 +1,273 @@
+"""
+Thread-aware conversation state for the Expert Panel Assistant.
+
+Follow-up emails in the same thread reuse the experts and answers from
+earlier turns instead of re-running the whole panel from scratch.
+Threads are keyed by Message-ID / In-Reply-To / References headers, with a
+normalized subject line as the fallback for replies ("Re: ...").
+"""
+import json
+import os
+import re
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from email.parser import HeaderParser
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_STATE_PATH = "conversation_state.json"
+
+_MESSAGE_ID_PATTERN = re.compile(r"<[^<>\s]+>")
+_SUBJECT_PREFIX_PATTERN = re.compile(r"^\s*((re|fw|fwd|aw|sv)(\[\d+\])?\s*:\s*)+", re.IGNORECASE)
+_KNOWN_HEADERS = {
+    "subject", "from", "to", "cc", "bcc", "date", "sent", "reply-to",
+    "message-id", "in-reply-to", "references",
+}
+_QUOTE_HEADER_PATTERN = re.compile(
+    r"^\s*(on\s.+\swrote:|-{2,}\s*original message\s*-{2,}|_{10,})\s*$", re.IGNORECASE
+)
+# Outlook quotes the previous message under a bare "From: / Sent: / To: / Subject:" block
+_QUOTED_FROM_PATTERN = re.compile(r"^\W*from\W*:", re.IGNORECASE)
+_QUOTED_DATE_PATTERN = re.compile(r"^\W*(sent|date)\W*:", re.IGNORECASE)
+
+
+def _split_header_block(email_content: str) -> Tuple[Dict[str, str], List[str]]:
+    """
+    Split an email into its header block and the remaining body lines.
+    The lines before the first blank line are parsed as RFC 5322 headers
+    (folded values and any header name are accepted). They only count as
+    headers when the whole block parses cleanly and includes at least one
+    known header name, so a body that starts with e.g. "Question: ..." is
+    left intact.
+    """
+    lines = email_content.strip().splitlines()
+    blank = next((i for i, line in enumerate(lines) if not line.strip()), None)
+    if blank is None:
+        return {}, lines
+
+    message = HeaderParser().parsestr("\n".join(lines[:blank]) + "\n")
+    if message.defects or message.get_payload().strip():
+        return {}, lines
+
+    headers: Dict[str, str] = {}
+    for name, value in message.items():
+        headers.setdefault(name.lower(), " ".join(str(value).split()))
+    if not _KNOWN_HEADERS & headers.keys():
+        return {}, lines
+
+    return headers, lines[blank + 1:]
+
+
+def parse_email_headers(email_content: str) -> Dict[str, str]:
+    """
+    Parse RFC 822 style headers from the top of the email content.
+    Keys are lower-cased, e.g. "message-id", "in-reply-to", "subject".
+    Returns an empty dict when the email does not start with a header block.
+    """
+    return _split_header_block(email_content)[0]
+
+
+def normalize_subject(subject: str) -> str:
+    """Strip reply/forward prefixes and collapse whitespace so a thread's subjects compare equal."""
+    subject = _SUBJECT_PREFIX_PATTERN.sub("", subject or "")
+    return " ".join(subject.lower().split())
+
+
+def _starts_quote(lines: List[str], i: int) -> bool:
+    """
+    Whether lines[i] starts the quoted history: an "On ... wrote:" line,
+    an "-----Original Message-----" or underscore divider, or an Outlook
+    "From:" line followed by a "Sent:" / "Date:" line.
+    """
+    if _QUOTE_HEADER_PATTERN.match(lines[i]):
+        return True
+    if not _QUOTED_FROM_PATTERN.match(lines[i]):
+        return False
+    following = [line for line in lines[i + 1:i + 4] if line.strip()][:2]
+    return any(_QUOTED_DATE_PATTERN.match(line) for line in following)
+
+
+def extract_new_message(email_content: str) -> str:
+    """
+    Return only the newly written part of an email: headers, quoted lines
+    ("> ...") and everything from the start of the quoted history (see
+    _starts_quote) onwards are dropped.
+    Returns an empty string when the email contains nothing new.
+    """
+    lines = _split_header_block(email_content)[1]
+    new_lines = []
+    for i, line in enumerate(lines):
+        if _starts_quote(lines, i):
+            break
+        if line.lstrip().startswith(">"):
+            continue
+        new_lines.append(line)
+
+    return "\n".join(new_lines).strip()
+
+
+def summarize_response(response: str, max_chars: int = 400) -> str:
+    """
+    Build a compact summary of an expert's answer for the next turn:
+    the leading sentences of the response, capped at max_chars.
+    """
+    text = " ".join(str(response).split())
+    if len(text) <= max_chars:
+        return text
+
+    summary = ""
+    for sentence in re.split(r"(?<=[.!?])\s+", text):
+        if len(summary) + len(sentence) + 1 > max_chars:
+            break
+        summary = f"{summary} {sentence}".strip()
+
+    return summary or text[:max_chars].rstrip() + "..."
+
+
+@dataclass
+class ExpertTurn:
+    """The latest answer an expert gave in a thread."""
+    response: str
+    summary: str
+    topics: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ThreadState:
+    """Everything remembered about one email thread."""
+    thread_id: str
+    subject: str = ""
+    message_ids: List[str] = field(default_factory=list)
+    experts: List[str] = field(default_factory=list)
+    turns: Dict[str, ExpertTurn] = field(default_factory=dict)
+    updated_at: str = ""
+
+    def prior_summaries(self) -> Dict[str, str]:
+        """Compact summary of each pinned expert's previous answer."""
+        return {expert: turn.summary for expert, turn in self.turns.items() if expert in self.experts}
+
+    def unchanged_experts(self, new_message: str, topics: Dict[str, List[str]]) -> Dict[str, str]:
+        """
+        Experts whose previous answer still covers the new message, mapped to
+        that answer. An expert is only skipped when the new message adds nothing
+        for it: either there is no new text at all (only quotes), or the new
+        text hits some of the expert's keywords and all of them were already
+        covered by earlier turns. A follow-up that hits none of an expert's
+        keywords is a new question and is answered again.
+        """
+        unchanged = {}
+        for expert in self.experts:
+            turn = self.turns.get(expert)
+            if turn is None:
+                continue
+            expert_topics = set(topics.get(expert, []))
+            if not new_message.strip() or (expert_topics and expert_topics <= set(turn.topics)):
+                unchanged[expert] = turn.response
+        return unchanged
+
+
+class ConversationStore:
+    """
+    JSON-file backed store of thread state.
+    The file location defaults to the CONVERSATION_STATE_PATH environment variable.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("CONVERSATION_STATE_PATH", DEFAULT_STATE_PATH)
+        self.threads: Dict[str, ThreadState] = {}
+        self._message_index: Dict[str, str] = {}
+        self._subject_index: Dict[str, str] = {}
+        self.load()
+
+    def load(self) -> None:
+        """Load thread state from disk, starting empty if the file does not exist."""
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        for thread_id, raw in data.get("threads", {}).items():
+            turns = {expert: ExpertTurn(**turn) for expert, turn in raw.pop("turns", {}).items()}
+            self._index(ThreadState(turns=turns, **raw))
+
+    def save(self) -> None:
+        """Write all thread state to disk atomically."""
+        data = {"threads": {thread_id: asdict(thread) for thread_id, thread in self.threads.items()}}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def _index(self, thread: ThreadState) -> None:
+        self.threads[thread.thread_id] = thread
+        for message_id in thread.message_ids:
+            self._message_index[message_id] = thread.thread_id
+        if thread.subject:
+            self._subject_index[thread.subject] = thread.thread_id
+
+    def find_thread(self, email_content: str) -> Optional[ThreadState]:
+        """
+        Find the thread an email belongs to.
+        Matches In-Reply-To / References against known Message-IDs first,
+        then falls back to the normalized subject line, but only for replies
+        so a new email that reuses a generic subject starts a new thread.
+        """
+        headers = parse_email_headers(email_content)
+
+        referenced = _MESSAGE_ID_PATTERN.findall(
+            f"{headers.get('in-reply-to', '')} {headers.get('references', '')}"
+        )
+        for message_id in reversed(referenced):
+            if message_id in self._message_index:
+                return self.threads[self._message_index[message_id]]
+
+        raw_subject = headers.get("subject", "")
+        subject = normalize_subject(raw_subject)
+        if subject and _SUBJECT_PREFIX_PATTERN.match(raw_subject) and subject in self._subject_index:
+            return self.threads[self._subject_index[subject]]
+
+        return None
+
+    def record_turn(
+        self,
+        email_content: str,
+        experts: List[str],
+        expert_responses: Dict[str, str],
+        topics: Dict[str, List[str]],
+        thread: Optional[ThreadState] = None,
+    ) -> Optional[ThreadState]:
+        """
+        Record a completed panel run against its thread, creating the thread if needed.
+        Experts without a new response keep their previous turn.
+        Emails without a Message-ID or Subject could never be matched by a
+        follow-up, so they do not start a thread and None is returned.
+        """
+        headers = parse_email_headers(email_content)
+        message_ids = _MESSAGE_ID_PATTERN.findall(headers.get("message-id", ""))
+        subject = normalize_subject(headers.get("subject", ""))
+
+        if thread is None:
+            if not message_ids and not subject:
+                return None
+            thread = ThreadState(thread_id=message_ids[0] if message_ids else subject, subject=subject)
+
+        for message_id in message_ids:
+            if message_id not in thread.message_ids:
+                thread.message_ids.append(message_id)
+        if subject and not thread.subject:
+            thread.subject = subject
+
+        thread.experts = list(experts)
+        for expert, response in expert_responses.items():
+            previous = thread.turns.get(expert)
+            covered = set(previous.topics) if previous else set()
+            covered.update(topics.get(expert, []))
+            thread.turns[expert] = ExpertTurn(
+                response=response,
+                summary=summarize_response(response),
+                topics=sorted(covered),
+            )
+        thread.updated_at = datetime.now().isoformat()
+
+        self._index(thread)
+        return thread
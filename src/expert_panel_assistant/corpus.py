@@ -0,0 +1,33 @@
+"""
+Email corpus loading for batch commands.
+
+A corpus is a JSONL file with one email per line, e.g.
+{"id": "msg-001", "email": "Subject: ...\n\nHi Expert Panel, ..."}
+Lines may also be plain JSON strings. Emails without an id are numbered by line.
+"""
+import json
+from typing import Dict, Iterator, List
+
+
+def parse_corpus_line(line: str, default_id: str) -> Dict[str, str]:
+    """Parse one corpus line into {"id": ..., "email": ...}, using default_id when the line has no id."""
+    record = json.loads(line)
+    if isinstance(record, str):
+        record = {"email": record}
+    return {
+        "id": str(record.get("id") or default_id),
+        "email": str(record.get("email", "")),
+    }
+
+
+def iter_email_corpus(path: str) -> Iterator[Dict[str, str]]:
+    """Iterate over the emails in a JSONL corpus file, skipping blank lines."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if line.strip():
+                yield parse_corpus_line(line, f"line-{line_number}")
+
+
+def load_email_corpus(path: str) -> List[Dict[str, str]]:
+    """Load all emails from a JSONL corpus file."""
+    return list(iter_email_corpus(path))
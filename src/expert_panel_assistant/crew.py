@@ -1,10 +1,19 @@
 from crewai import Agent, Task, Crew, Process
 from crewai.project import CrewBase, agent, task, crew
 from crewai.agents.agent_builder.base_agent import BaseAgent
-from typing import List, Dict
+from crewai.llms.base_llm import BaseLLM
+from typing import Callable, List, Dict, Optional, Union
 import os
 from dotenv import load_dotenv
 
+from expert_panel_assistant.synthesis import (
+    EXPERT_FORMATTING,
+    STRUCTURED_RESPONSE_FORMAT,
+    get_synthesis_mode,
+    render_panel_response,
+    should_review,
+)
+
 # Load environment variables
 load_dotenv()
 
@@ -27,13 +36,17 @@ class ExpertPanelAssistant:
     expert_responses: Dict[str, str] = {}
     
     @staticmethod
-    def get_llm_config() -> str:
+    def get_llm_config() -> Union[str, BaseLLM]:
         """
         Get LLM configuration from environment variable.
-        Returns the LLM model string for CrewAI agents.
+        Returns the LLM model string for CrewAI agents, or an offline
+        StubLLM when LLM_MODEL is "stub".
         """
         llm_model = os.getenv('LLM_MODEL', 'anthropic/claude-3-5-haiku-latest')
         print(f"🤖 Using LLM: {llm_model}")
+        if llm_model == "stub":
+            from expert_panel_assistant.stub_llm import StubLLM
+            return StubLLM()
         return llm_model
 
     @property
@@ -151,21 +164,90 @@ class ExpertPanelAssistant:
 
     def _get_expert_emoji_and_title(self, expert_name: str) -> tuple:
         """Get emoji and title for each expert"""
-        expert_formatting = {
-            "simon_sinek": ("🧭", "Leadership & Vision"),
-            "julie_zhuo": ("👥", "Team Dynamics & Scaling"),
-            "satya_nadella": ("🚀", "Transformation & Innovation"),
-            "roger_martin": ("📈", "Strategy & Market Positioning"),
-            "chris_voss": ("🤝", "Negotiation & Persuasion")
-        }
-        return expert_formatting.get(expert_name, ("💡", "Expert Insights"))
+        return EXPERT_FORMATTING.get(expert_name, ("💡", "Expert Insights"))
+
+    @staticmethod
+    def _escape_template(text: str) -> str:
+        """Neutralize braces so prior output is not treated as a crew input placeholder"""
+        return str(text).replace("{", "(").replace("}", ")")
+
+    def _task_callback(self, stage: str, expert_name: Optional[str] = None) -> Optional[Callable]:
+        """Build a Task callback that reports the finished task's output to on_task_complete"""
+        on_task_complete = getattr(self, "_on_task_complete", None)
+        if on_task_complete is None:
+            return None
+        return lambda output: on_task_complete(stage, expert_name, output.raw)
+
+    def _format_responses(self, responses: Dict[str, str]) -> str:
+        """Format expert responses that did not run in this crew for a task description"""
+        return "\n".join(
+            f"- {expert}: {self._escape_template(response)}"
+            for expert, response in responses.items()
+        )
 
-    def create_dynamic_crew(self, selected_experts: List[str]) -> Crew:
+    def collect_expert_responses(self) -> Dict[str, str]:
+        """
+        Populate expert_responses from the response tasks of the last dynamic crew run.
+        Reused responses from earlier thread turns are kept as-is.
+        """
+        for expert_name, response_task in getattr(self, "_response_tasks", {}).items():
+            if response_task.output is not None:
+                self.expert_responses[expert_name] = response_task.output.raw
+        return self.expert_responses
+
+    def create_dynamic_crew(
+        self,
+        selected_experts: List[str],
+        prior_summaries: Optional[Dict[str, str]] = None,
+        reused_responses: Optional[Dict[str, str]] = None,
+        synthesis_mode: Optional[str] = None,
+        completed_assessments: Optional[Dict[str, str]] = None,
+        on_task_complete: Optional[Callable[[str, Optional[str], str], None]] = None,
+        review: Optional[bool] = None,
+        restored_responses: Optional[Dict[str, str]] = None,
+        executive_summary: Optional[str] = None,
+    ) -> Crew:
         """
         Creates a dynamic crew with only the selected experts.
         This bypasses the routing task and directly engages the selected experts.
+
+        For follow-ups in a thread, prior_summaries gives each expert a compact
+        summary of its own previous answer, and experts in reused_responses are
+        not re-run: their previous answer goes straight to synthesis.
+
+        synthesis_mode (default: SYNTHESIS_MODE environment variable) is one of:
+        - "llm": the router agent writes the reply (synthesis_task)
+        - "fast": the reply is rendered from a template, the router only writes an executive summary
+        - "template": the reply is rendered from a template without any router LLM call
+        For the template modes, call assemble_template_response() after kickoff.
+        Quality review runs on the QUALITY_REVIEW_RATE fraction of runs, unless
+        review forces the decision (e.g. to compare modes on equal work).
+
+        When resuming from checkpoints, experts in completed_assessments skip their
+        assessment task, experts in restored_responses are not re-run, and a
+        checkpointed executive_summary skips the summary task.
+        on_task_complete(stage, expert_name, output) is called as each
+        assessment, response, synthesis, summary and review task finishes.
         """
+        prior_summaries = prior_summaries or {}
+        restored_responses = restored_responses or {}
+        reused_responses = {
+            expert: response for expert, response in (reused_responses or {}).items()
+            if expert not in restored_responses
+        }
+        completed_assessments = completed_assessments or {}
+
         self.selected_experts = selected_experts
+        self.expert_responses = {**reused_responses, **restored_responses}
+        self._executive_summary = executive_summary
+        self.synthesis_mode = synthesis_mode or get_synthesis_mode()
+        self._response_tasks: Dict[str, Task] = {}
+        self._summary_task: Optional[Task] = None
+        self._review_sampled = should_review() if review is None else review
+        self._on_task_complete = on_task_complete
+
+        # Template synthesis needs expert output it can split into insight and key actions
+        response_format = STRUCTURED_RESPONSE_FORMAT if self.synthesis_mode != "llm" else ""
         
         # Create only the agents we need
         dynamic_agents = []
@@ -173,47 +255,110 @@ class ExpertPanelAssistant:
 
         # Add only the selected expert agents
         for expert_name in selected_experts:
+            if expert_name in self.expert_responses:
+                continue
+
             expert_agent = self.get_expert_agent_by_name(expert_name)
             if expert_agent:
                 dynamic_agents.append(expert_agent)
 
+                # Follow-ups only carry the new message, so remind the expert what it already said
+                prior_note = ""
+                if expert_name in prior_summaries:
+                    prior_note = f"""
+                    This is a follow-up in an ongoing thread. Summary of your previous answer:
+                    {self._escape_template(prior_summaries[expert_name])}
+                    Build on it and address only what is new in the message below.
+                    """
+
                 # Create assessment and response tasks for each expert
                 # Use a simpler approach without accessing config directly
-                assessment_task = Task(
-                    description=f"""
-                    Review the email content and determine if it falls within your area of expertise as {expert_name}. 
-                    If yes, prepare to provide insights. If no, decline politely.
-                    
-                    Email Content:
-                    {{email}}
-                    """,
-                    expected_output="Either 'RELEVANT' with a brief note on why this falls in your expertise, OR 'NOT RELEVANT - No insights to add.'",
-                    agent=expert_agent
-                )
+                if expert_name in completed_assessments:
+                    # Assessment was checkpointed by an earlier run; hand it to the response directly
+                    assessment_task = None
+                    prior_note += f"""
+                    Your assessment of this email (already completed):
+                    {self._escape_template(completed_assessments[expert_name])}
+                    """
+                else:
+                    assessment_task = Task(
+                        description=f"""
+                        Review the email content and determine if it falls within your area of expertise as {expert_name}. 
+                        If yes, prepare to provide insights. If no, decline politely.
+                        
+                        Email Content:
+                        {{email}}
+                        """,
+                        expected_output="Either 'RELEVANT' with a brief note on why this falls in your expertise, OR 'NOT RELEVANT - No insights to add.'",
+                        agent=expert_agent,
+                        callback=self._task_callback("assessment", expert_name)
+                    )
+                    dynamic_tasks.append(assessment_task)
                 
                 response_task = Task(
                     description=f"""
                     Provide a concise, actionable response to the email based on your expertise as {expert_name}. 
                     Focus on practical insights, strategic recommendations, or tactical guidance that directly 
                     addresses the sender's needs. Keep responses focused and implementable.
-                    
+                    {prior_note}
                     Email Content:
                     {{email}}
                     """,
-                    expected_output="A thoughtful, actionable paragraph (3-5 sentences) that provides specific value based on your expertise. Include concrete next steps or frameworks when applicable.",
+                    expected_output="A thoughtful, actionable paragraph (3-5 sentences) that provides specific value based on your expertise. Include concrete next steps or frameworks when applicable." + response_format,
                     agent=expert_agent,
-                    context=[assessment_task]  # Response depends on assessment
+                    context=[assessment_task] if assessment_task else [],  # Response depends on assessment
+                    callback=self._task_callback("response", expert_name)
                 )
-                dynamic_tasks.extend([assessment_task, response_task])
+                dynamic_tasks.append(response_task)
+                self._response_tasks[expert_name] = response_task
 
         # Add router agent for synthesis and quality control
         router_agent = self.router()
         dynamic_agents.append(router_agent)
 
         # Create synthesis task that uses all expert responses as context
-        # Get just the response tasks (every second task starting from index 1)
-        expert_response_tasks = [dynamic_tasks[i] for i in range(1, len(dynamic_tasks), 2)]
-        
+        expert_response_tasks = list(self._response_tasks.values())
+
+        # Experts skipped on this run still contribute their answer
+        skipped_note = ""
+        if reused_responses:
+            skipped_note += f"""
+            Earlier answers from this thread that are still current (include them as-is):
+            {self._format_responses(reused_responses)}
+            """
+        if restored_responses:
+            skipped_note += f"""
+            Expert responses already completed for this email (include them as-is):
+            {self._format_responses(restored_responses)}
+            """
+
+        if self.synthesis_mode != "llm":
+            # The reply itself is rendered locally; at most ask for a short executive summary
+            has_responses = bool(expert_response_tasks or self.expert_responses)
+            if self.synthesis_mode == "fast" and executive_summary is None and has_responses:
+                self._summary_task = Task(
+                    description=f"""
+                    Write a short executive summary of the expert responses for a reply to the email below.
+                    Capture the main recommendations only; do not repeat each expert's full answer.
+                    {skipped_note}
+                    Original Email:
+                    {{email}}
+                    """,
+                    expected_output="A 2-3 sentence executive summary in plain text, without headers or bullet points.",
+                    agent=router_agent,
+                    context=expert_response_tasks,
+                    callback=self._task_callback("summary")
+                )
+                dynamic_tasks.append(self._summary_task)
+
+            return Crew(
+                agents=dynamic_agents,
+                tasks=dynamic_tasks,
+                process=Process.sequential,
+                verbose=True
+            )
+
+
         synthesis_task = Task(
             description=f"""
             Compile all expert responses into a cohesive, well-structured reply email with enhanced formatting. 
@@ -234,7 +379,7 @@ class ExpertPanelAssistant:
             - Satya Nadella: 🚀 (Transformation & Innovation)
             - Roger Martin: 📈 (Strategy & Market Positioning)
             - Chris Voss: 🤝 (Negotiation & Persuasion)
-            
+            {skipped_note}
             Original Email:
             {{email}}
             """,
@@ -277,7 +422,8 @@ class ExpertPanelAssistant:
             agent=router_agent,
             context=expert_response_tasks,  # Use all expert responses as context
             markdown=True,
-            output_file="panel_response.md"  # Save synthesis output to file
+            output_file="panel_response.md",  # Save synthesis output to file
+            callback=self._task_callback("synthesis")
         )
         
         quality_task = Task(
@@ -291,10 +437,13 @@ class ExpertPanelAssistant:
             """,
             expected_output="Either 'APPROVED' if the response meets quality standards, OR specific recommendations for improvement focusing on clarity, completeness, or actionability.",
             agent=router_agent,
-            context=[synthesis_task]  # Quality review the synthesis
+            context=[synthesis_task],  # Quality review the synthesis
+            callback=self._task_callback("review")
         )
 
-        dynamic_tasks.extend([synthesis_task, quality_task])
+        dynamic_tasks.append(synthesis_task)
+        if self._review_sampled:
+            dynamic_tasks.append(quality_task)
 
         return Crew(
             agents=dynamic_agents,
@@ -302,3 +451,55 @@ class ExpertPanelAssistant:
             process=Process.sequential,
             verbose=True
         )
+
+    def assemble_template_response(
+        self,
+        inputs: Dict[str, str],
+        output_file: str = "panel_response.md",
+        skip_review: bool = False,
+    ) -> str:
+        """
+        Render the panel reply from the expert responses of the last dynamic crew run
+        (template synthesis modes) and save it to output_file.
+        If this run was sampled for quality review, the rendered reply is reviewed by the router.
+        A checkpointed executive summary is used when the summary task did not run.
+        """
+        executive_summary = self._executive_summary
+        if self._summary_task is not None and self._summary_task.output is not None:
+            executive_summary = self._summary_task.output.raw
+
+        response = render_panel_response(self.collect_expert_responses(), executive_summary)
+        with open(output_file, "w", encoding="utf-8") as f:
+            f.write(response)
+
+        if self._review_sampled and not skip_review:
+            review = self.review_response(response, inputs)
+            print(f"🔎 Quality review: {review}")
+
+        return response
+
+    def review_response(self, response: str, inputs: Dict[str, str]) -> str:
+        """Run the router's quality review on an already assembled reply."""
+        review_task = Task(
+            description=f"""
+            Review the synthesized response for clarity, completeness, and professionalism. 
+            Ensure all key points from the original email are addressed and that the response 
+            provides genuine value to the recipient.
+            
+            Synthesized Response:
+            {self._escape_template(response)}
+            
+            Original Email:
+            {{email}}
+            """,
+            expected_output="Either 'APPROVED' if the response meets quality standards, OR specific recommendations for improvement focusing on clarity, completeness, or actionability.",
+            agent=self.router(),
+            callback=self._task_callback("review")
+        )
+        review_crew = Crew(
+            agents=[self.router()],
+            tasks=[review_task],
+            process=Process.sequential,
+            verbose=True
+        )
+        return str(review_crew.kickoff(inputs=inputs))
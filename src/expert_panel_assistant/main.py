@@ -3,73 +3,44 @@ import sys
 import warnings
 import os
 import re
+import time
 from datetime import datetime
-from typing import Dict, Any, List
+from statistics import mean, median
+from typing import Callable, Dict, Any, List, Optional
 
 from expert_panel_assistant.crew import ExpertPanelAssistant
+from expert_panel_assistant.bulk_routing import run_bulk_routing
+from expert_panel_assistant.checkpoints import CheckpointLog, EmailProgress
+from expert_panel_assistant.conversation_state import ConversationStore, extract_new_message
+from expert_panel_assistant.routing import expert_topic_keywords, simple_content_routing
+from expert_panel_assistant.corpus import load_email_corpus
+from expert_panel_assistant.profiling import Profiler, profile_stage
+from expert_panel_assistant.synthesis import SYNTHESIS_MODES, get_synthesis_mode, should_review
+
+# parse_expert_names used to be defined in this module; re-exported so existing imports keep working
+from expert_panel_assistant.routing import parse_expert_names  # noqa: F401
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
 # This main file is intended to be a way for you to run your
 # crew locally, so refrain from adding unnecessary logic into this file.
 
-def parse_expert_names(router_result: str) -> List[str]:
-    """
-    Parse expert names from the router result output.
-    Expected format: Contains expert names like "simon_sinek", "julie_zhuo", etc.
-    """
-    # Define all possible expert names
-    expert_names = ["simon_sinek", "julie_zhuo", "satya_nadella", "roger_martin", "chris_voss"]
-    
-    # Convert result to lowercase for matching
-    result_lower = str(router_result).lower()
-    
-    selected_experts = []
-    for name in expert_names:
-        # Check for various formats: "simon_sinek", "Simon Sinek", "simon sinek"
-        name_variants = [
-            name,
-            name.replace("_", " "),
-            name.replace("_", "").replace(" ", ""),
-            " ".join(word.capitalize() for word in name.split("_"))
-        ]
+SAMPLE_EMAIL = """Subject: Strategic Team Restructuring and Leadership Alignment
         
-        if any(variant.lower() in result_lower for variant in name_variants):
-            selected_experts.append(name)
-    
-    # Fallback: if no experts found, try regex pattern matching
-    if not selected_experts:
-        # Look for patterns like "Selected experts: name1, name2, name3"
-        patterns = [
-            r'selected[^:]*:\s*([^.]+)',
-            r'experts?[^:]*:\s*([^.]+)',
-            r'recommend[^:]*:\s*([^.]+)',
-            r'relevant[^:]*:\s*([^.]+)'
-        ]
+        Hi Expert Panel,
         
-        for pattern in patterns:
-            match = re.search(pattern, result_lower, re.IGNORECASE)
-            if match:
-                matched_text = match.group(1)
-                for name in expert_names:
-                    if any(variant.lower() in matched_text for variant in [
-                        name,
-                        name.replace("_", " "),
-                        " ".join(word.capitalize() for word in name.split("_"))
-                    ]):
-                        if name not in selected_experts:
-                            selected_experts.append(name)
-                break
-    
-    # Limit to maximum 3 experts as per requirements
-    selected_experts = selected_experts[:3]
-    
-    # If still no experts found, default to a reasonable selection
-    if not selected_experts:
-        print("⚠️  Could not parse expert selection from router output. Using default experts.")
-        selected_experts = ["simon_sinek", "julie_zhuo", "roger_martin"]
-    
-    return selected_experts
+        We're facing a critical decision about restructuring our 150-person engineering team while maintaining momentum on our key product initiatives. The challenge involves:
+        
+        1. Leadership alignment across multiple product lines
+        2. Scaling team communication and decision-making processes  
+        3. Negotiating resource allocation between competing priorities
+        4. Maintaining innovation velocity during organizational change
+        
+        Looking for strategic guidance on approach and timing.
+        
+        Best regards,
+        Sarah Johnson
+        VP Engineering"""
 
 def get_email_input() -> str:
     """
@@ -176,24 +147,12 @@ def run():
             'current_year': str(datetime.now().year)
         }
         
-        # Step 1: Create expert panel and analyze content for routing
-        print("🔍 Analyzing content and selecting relevant experts...")
-        expert_panel = ExpertPanelAssistant()
-        
+        # Analyze content for routing (or pick up the existing thread), then
+        # run the panel with only the selected experts.
         # For now, use a simple content-based routing approach
         # This could be enhanced with LLM-based routing in the future
-        selected_experts = simple_content_routing(email_content)
-        
-        # Display routing results
-        display_routing_results(selected_experts)
-        
-        # Step 2: Create dynamic crew with only selected experts
-        print("🚀 Creating dynamic expert panel...")
-        dynamic_crew = expert_panel.create_dynamic_crew(selected_experts)
-        
-        # Step 3: Run the full analysis with selected experts
-        print("💬 Expert panel providing insights...")
-        result = dynamic_crew.kickoff(inputs=inputs)
+        print("🔍 Analyzing content and selecting relevant experts...")
+        result = run_panel(email_content, inputs, ConversationStore())
         
         # Display results
         display_results(result)
@@ -212,62 +171,111 @@ def run():
             traceback.print_exc()
         sys.exit(1)
 
-def simple_content_routing(email_content: str) -> List[str]:
+def run_panel(
+    email_content: str,
+    inputs: Dict[str, Any],
+    store: Optional[ConversationStore] = None,
+    synthesis_mode: Optional[str] = None,
+    progress: Optional[EmailProgress] = None,
+    on_task_complete: Optional[Callable[[str, Optional[str], str], None]] = None,
+    review: Optional[bool] = None,
+) -> Any:
     """
-    Simple content-based routing to select appropriate experts.
-    This analyzes keywords in the email to determine relevance.
+    Run the expert panel for one email, reusing earlier turns of the same thread.
+    Follow-ups keep the thread's experts, send them only the new message plus a
+    summary of their previous answer, and skip experts whose topic has not changed.
+    Without a store every email is treated as a new thread and nothing is recorded.
+
+    For resumable batch runs, progress holds task outputs checkpointed by an
+    earlier attempt (those tasks are skipped) and on_task_complete is called
+    as each task finishes. review forces the quality review on or off instead
+    of sampling it at QUALITY_REVIEW_RATE.
     """
-    content_lower = email_content.lower()
-    selected_experts = []
-    
-    # Keyword mapping for expert selection
-    expert_keywords = {
-        "simon_sinek": ["leadership", "vision", "purpose", "inspire", "motivation", "culture", "values", "why"],
-        "julie_zhuo": ["team", "scaling", "management", "growth", "dynamics", "communication", "people", "hiring"],
-        "satya_nadella": ["transformation", "innovation", "technology", "digital", "cloud", "ai", "partnership", "enterprise"],
-        "roger_martin": ["strategy", "market", "competition", "positioning", "investment", "growth", "decision", "analysis"],
-        "chris_voss": ["negotiation", "deal", "agreement", "conflict", "persuasion", "pricing", "customer", "partnership"]
-    }
-    
-    # Score each expert based on keyword matches
-    expert_scores = {}
-    for expert, keywords in expert_keywords.items():
-        score = sum(1 for keyword in keywords if keyword in content_lower)
-        if score > 0:
-            expert_scores[expert] = score
-    
-    # Select top 3 experts by score
-    sorted_experts = sorted(expert_scores.items(), key=lambda x: x[1], reverse=True)
-    selected_experts = [expert for expert, score in sorted_experts[:3]]
-    
-    # If no keywords matched, use default experts
-    if not selected_experts:
-        print("⚠️  No specific expertise keywords found. Using balanced expert panel.")
-        selected_experts = ["simon_sinek", "julie_zhuo", "roger_martin"]
-    
-    return selected_experts
+    with profile_stage("panel_setup"):
+        expert_panel = ExpertPanelAssistant()
+    progress = progress or EmailProgress()
+    synthesis_mode = synthesis_mode or get_synthesis_mode()
+
+    with profile_stage("routing"):
+        thread = store.find_thread(email_content) if store else None
+
+        if thread is None:
+            selected_experts = simple_content_routing(email_content)
+            topics = expert_topic_keywords(email_content)
+            prior_summaries, reused_responses = {}, {}
+        else:
+            new_message = extract_new_message(email_content)
+            print(f"🧵 Follow-up in thread '{thread.subject or thread.thread_id}' - reusing expert panel")
+            selected_experts = thread.experts
+            topics = expert_topic_keywords(new_message)
+            prior_summaries = thread.prior_summaries()
+            reused_responses = thread.unchanged_experts(new_message, topics)
+            inputs = {**inputs, 'email': new_message or email_content}
+            for expert in reused_responses:
+                print(f"  ♻️  {expert}: topic unchanged, reusing previous answer")
+
+    display_routing_results(selected_experts)
+
+    if progress.responses:
+        print(f"♻️  Restored {len(progress.responses)} expert response(s) from checkpoint")
+
+    if synthesis_mode == "llm" and progress.synthesis is not None:
+        # Synthesis finished before the interruption; only the quality review may be outstanding
+        print("♻️  Restored synthesis from checkpoint")
+        result = progress.synthesis
+        with open("panel_response.md", "w", encoding="utf-8") as f:
+            f.write(result)
+        if progress.review is None and (should_review() if review is None else review):
+            review_text = expert_panel.review_response(result, inputs)
+            if on_task_complete:
+                on_task_complete("review", None, review_text)
+        return result
+
+    print("🚀 Creating dynamic expert panel...")
+    with profile_stage("crew_construction"):
+        dynamic_crew = expert_panel.create_dynamic_crew(
+            selected_experts,
+            prior_summaries=prior_summaries,
+            reused_responses=reused_responses,
+            synthesis_mode=synthesis_mode,
+            completed_assessments=progress.assessments,
+            on_task_complete=on_task_complete,
+            review=review,
+            restored_responses=progress.responses,
+            executive_summary=progress.summary,
+        )
+
+    print("💬 Expert panel providing insights...")
+    with profile_stage("kickoff"):
+        result = dynamic_crew.kickoff(inputs=inputs) if dynamic_crew.tasks else None
+
+    if synthesis_mode != "llm":
+        print(f"🧩 Assembling reply from template ({synthesis_mode} synthesis)...")
+        with profile_stage("template_synthesis"):
+            result = expert_panel.assemble_template_response(
+                inputs,
+                skip_review=progress.review is not None,
+            )
+
+    if store:
+        with profile_stage("state_persistence"):
+            store.record_turn(
+                email_content,
+                selected_experts,
+                expert_panel.collect_expert_responses(),
+                topics,
+                thread=thread,
+            )
+            store.save()
+
+    return result
 
 def run_with_sample():
     """
     Run with sample email using dynamic routing.
     """
     inputs = {
-        'email': """Subject: Strategic Team Restructuring and Leadership Alignment
-        
-        Hi Expert Panel,
-        
-        We're facing a critical decision about restructuring our 150-person engineering team while maintaining momentum on our key product initiatives. The challenge involves:
-        
-        1. Leadership alignment across multiple product lines
-        2. Scaling team communication and decision-making processes  
-        3. Negotiating resource allocation between competing priorities
-        4. Maintaining innovation velocity during organizational change
-        
-        Looking for strategic guidance on approach and timing.
-        
-        Best regards,
-        Sarah Johnson
-        VP Engineering""",
+        'email': SAMPLE_EMAIL,
         'timestamp': datetime.now().isoformat(),
         'current_year': str(datetime.now().year)
     }
@@ -275,22 +283,9 @@ def run_with_sample():
     try:
         print("🧪 Running with sample email using dynamic routing...")
         
-        # Create the expert panel instance
-        expert_panel = ExpertPanelAssistant()
-        
-        # Analyze sample content for expert selection
-        selected_experts = simple_content_routing(inputs['email'])
-        
-        print(f"🎯 Selected experts: {selected_experts}")
-        display_routing_results(selected_experts)
-        
-        # Create dynamic crew with selected experts
-        print("🚀 Creating dynamic crew...")
-        dynamic_crew = expert_panel.create_dynamic_crew(selected_experts)
-        
-        # Run the workflow
+        # Route the sample, create the dynamic crew and run the workflow
         print("🏃 Running expert panel workflow...")
-        result = dynamic_crew.kickoff(inputs=inputs)
+        result = run_panel(inputs['email'], inputs)
         
         print("✅ Expert panel analysis complete!")
         print(f"📄 Full response saved to: panel_response.md")
@@ -365,6 +360,196 @@ def test():
     except Exception as e:
         raise Exception(f"An error occurred while testing the crew: {e}")
 
+def batch():
+    """
+    Run the expert panel over every email in a JSONL corpus with durable checkpoints.
+    Each finished task is appended to the checkpoint log; rerunning the same
+    command after a crash or interruption resumes where the last run stopped.
+    """
+    if len(sys.argv) < 3:
+        print("Usage: python main.py batch <corpus.jsonl> [checkpoint_log] [output_dir]")
+        sys.exit(1)
+
+    log = CheckpointLog(sys.argv[3] if len(sys.argv) > 3 else None)
+    output_dir = sys.argv[4] if len(sys.argv) > 4 else "batch_responses"
+    os.makedirs(output_dir, exist_ok=True)
+
+    synthesis_mode = get_synthesis_mode()
+    emails = load_email_corpus(sys.argv[2])
+    remaining = [record for record in emails if not log.is_done(record['id'])]
+
+    conflicts = log.mode_conflicts(synthesis_mode)
+    if conflicts:
+        recorded_modes = ", ".join(sorted(set(conflicts.values())))
+        print(f"❌ {len(conflicts)} unfinished email(s) in {log.path} were started with SYNTHESIS_MODE={recorded_modes}, not {synthesis_mode}.")
+        print("   Resume with the original mode, or start a new checkpoint log.")
+        sys.exit(1)
+    print(f"📬 Batch of {len(emails)} email(s): {len(emails) - len(remaining)} already done, {len(remaining)} to run")
+    print(f"📝 Checkpoint log: {log.path}")
+
+    try:
+        for i, record in enumerate(remaining, 1):
+            email_id = record['id']
+            print(f"\n📧 [{i}/{len(remaining)}] Processing email {email_id}...")
+            inputs = {
+                'email': record['email'],
+                'timestamp': datetime.now().isoformat(),
+                'current_year': str(datetime.now().year)
+            }
+            if log.progress(email_id).synthesis_mode is None:
+                log.record(email_id, "synthesis_mode", synthesis_mode)
+
+            result = run_panel(
+                record['email'],
+                inputs,
+                synthesis_mode=synthesis_mode,
+                progress=log.progress(email_id),
+                on_task_complete=log.recorder(email_id),
+            )
+
+            # In llm mode the crew result is the quality review; the reply is the synthesis
+            response = log.progress(email_id).synthesis if synthesis_mode == "llm" else str(result)
+            file_name = re.sub(r"[^\w.-]", "_", email_id)
+            with open(os.path.join(output_dir, f"{file_name}.md"), "w", encoding="utf-8") as f:
+                f.write(response or "")
+            log.record(email_id, "done", response or "")
+            print(f"✅ Email {email_id} done")
+
+    except KeyboardInterrupt:
+        print("\n\n❌ Batch interrupted by user. Completed tasks are checkpointed - rerun the same command to resume.")
+        sys.exit(0)
+    except Exception as e:
+        raise Exception(f"An error occurred while running the batch (rerun to resume): {e}")
+
+    print(f"\n✅ Batch complete. Responses saved to: {output_dir}/")
+
+def route_bulk():
+    """
+    Route a large JSONL corpus to experts without any LLM calls, across all CPU cores.
+    """
+    if len(sys.argv) < 3:
+        print("Usage: python main.py route_bulk <corpus.jsonl> [output_dir] [workers]")
+        sys.exit(1)
+
+    output_dir = sys.argv[3] if len(sys.argv) > 3 else "routing_results"
+    workers = int(sys.argv[4]) if len(sys.argv) > 4 else None
+
+    try:
+        print(f"🔀 Routing {sys.argv[2]} with {workers or os.cpu_count()} worker process(es)...")
+        start = time.perf_counter()
+        summary = run_bulk_routing(sys.argv[2], output_dir, workers=workers)
+        elapsed = time.perf_counter() - start
+    except Exception as e:
+        raise Exception(f"An error occurred while routing the corpus: {e}")
+
+    rows = summary['rows']
+    print(f"\n🎯 BULK ROUTING RESULTS ({rows} emails in {elapsed:.1f}s, {rows / elapsed if elapsed else 0:,.0f} emails/s)")
+    print("-"*60)
+    print(f"{'expert':<16}{'selected':>10}{'share':>8}   score histogram (0, 1, 2, ...)")
+    for expert, count in summary['counts'].items():
+        share = f"{count / rows:.0%}" if rows else "-"
+        histogram = ", ".join(str(n) for n in summary['histograms'][expert])
+        print(f"{expert:<16}{count:>10}{share:>8}   {histogram}")
+    print("-"*60)
+    print(f"No keyword match (default panel): {summary['defaulted']}")
+    if summary['errors']:
+        print(f"⚠️  Skipped {summary['errors']} unparseable line(s)")
+    print(f"✅ Columnar results saved to: {output_dir}/")
+
+def profile():
+    """
+    Run the expert panel on one email under the sampling profiler and tracemalloc.
+    Writes a collapsed-stack file for flamegraph tools and a summary table of
+    stages, time categories (LLM wait vs framework vs stdout), hotspots and allocations.
+    """
+    if len(sys.argv) > 2 and sys.argv[2] not in ("stub", "live"):
+        print("Usage: python main.py profile [stub|live] [email_file] [output_prefix]")
+        sys.exit(1)
+
+    llm = sys.argv[2] if len(sys.argv) > 2 else "stub"
+    output_prefix = sys.argv[4] if len(sys.argv) > 4 else "panel_profile"
+    if llm == "stub":
+        os.environ['LLM_MODEL'] = "stub"
+
+    email_content = SAMPLE_EMAIL
+    if len(sys.argv) > 3:
+        with open(sys.argv[3], "r", encoding="utf-8") as f:
+            email_content = f.read()
+
+    inputs = {
+        'email': email_content,
+        'timestamp': datetime.now().isoformat(),
+        'current_year': str(datetime.now().year)
+    }
+
+    interval = float(os.getenv('PROFILE_INTERVAL', '0.005'))
+    print(f"🔬 Profiling expert panel ({llm} LLM, sampling every {interval * 1000:g}ms)...")
+    try:
+        with Profiler(interval=interval) as profiler:
+            run_panel(email_content, inputs)
+    except Exception as e:
+        raise Exception(f"An error occurred while profiling the crew: {e}")
+
+    stacks_file = f"{output_prefix}.folded"
+    summary_file = f"{output_prefix}_summary.txt"
+    profiler.write_collapsed_stacks(stacks_file)
+    summary = profiler.summary()
+    with open(summary_file, "w", encoding="utf-8") as f:
+        f.write(summary)
+
+    print("\n" + "="*60)
+    print("PROFILE SUMMARY")
+    print("="*60)
+    print(summary)
+    print(f"🔥 Flamegraph stacks saved to: {stacks_file} (e.g. flamegraph.pl {stacks_file} > profile.svg)")
+    print(f"📊 Summary saved to: {summary_file}")
+
+def benchmark():
+    """
+    Compare end-to-end latency of the synthesis modes on the same email corpus.
+    The quality review decision is sampled once per email and shared by every
+    mode, so all modes do the same review work.
+    """
+    if len(sys.argv) < 3:
+        print("Usage: python main.py benchmark <corpus.jsonl> [mode,mode,...]")
+        sys.exit(1)
+
+    modes = sys.argv[3].split(",") if len(sys.argv) > 3 else list(SYNTHESIS_MODES)
+    unknown_modes = [mode for mode in modes if mode not in SYNTHESIS_MODES]
+    if unknown_modes:
+        print(f"Unknown synthesis mode(s): {', '.join(unknown_modes)}")
+        print(f"Available modes: {', '.join(SYNTHESIS_MODES)}")
+        sys.exit(1)
+
+    emails = load_email_corpus(sys.argv[2])
+    print(f"⏱️  Benchmarking {len(emails)} email(s) across modes: {', '.join(modes)}")
+
+    timings: Dict[str, List[float]] = {mode: [] for mode in modes}
+    try:
+        for record in emails:
+            review = should_review()
+            for mode in modes:
+                inputs = {
+                    'email': record['email'],
+                    'timestamp': datetime.now().isoformat(),
+                    'current_year': str(datetime.now().year)
+                }
+                start = time.perf_counter()
+                run_panel(record['email'], inputs, synthesis_mode=mode, review=review)
+                timings[mode].append(time.perf_counter() - start)
+    except Exception as e:
+        raise Exception(f"An error occurred while benchmarking the crew: {e}")
+
+    baseline = mean(timings[modes[0]])
+    print("\n⏱️  SYNTHESIS MODE LATENCY")
+    print("-"*60)
+    print(f"{'mode':<10}{'runs':>6}{'mean (s)':>12}{'median (s)':>12}{'vs ' + modes[0]:>20}")
+    for mode in modes:
+        mode_mean = mean(timings[mode])
+        delta = f"{mode_mean - baseline:+.2f}s ({(mode_mean / baseline - 1) * 100:+.0f}%)" if baseline else "-"
+        print(f"{mode:<10}{len(timings[mode]):>6}{mode_mean:>12.2f}{median(timings[mode]):>12.2f}{delta:>20}")
+    print("-"*60)
+
 def main():
     """
     Main entry point with command routing.
@@ -379,9 +564,17 @@ def main():
             test()
         elif command == "sample":
             run_with_sample()
+        elif command == "benchmark":
+            benchmark()
+        elif command == "batch":
+            batch()
+        elif command == "route_bulk":
+            route_bulk()
+        elif command == "profile":
+            profile()
         else:
             print(f"Unknown command: {command}")
-            print("Available commands: train, replay, test, sample")
+            print("Available commands: train, replay, test, sample, benchmark, batch, route_bulk, profile")
             print("Or run without arguments for interactive mode")
             sys.exit(1)
     else:
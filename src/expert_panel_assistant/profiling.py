@@ -0,0 +1,247 @@
+"""
+Built-in profiling for the Expert Panel Assistant.
+
+A background thread samples the profiled thread's Python stack at a fixed
+interval, and tracemalloc tracks memory per stage. Each sample is
+attributed to the current stage (marked with profile_stage) and to a
+category, so time spent waiting on the LLM can be told apart from crewai
+orchestration, console output and our own code.
+
+Outputs:
+- a collapsed-stack file ("stage;frame;frame count" per line) for
+  flamegraph.pl, speedscope or inferno
+- a summary table of stages, categories, hotspots and allocation sites
+"""
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_INTERVAL = 0.005
+
+
+def _package(name: str) -> str:
+    return f"{os.sep}{name}{os.sep}"
+
+
+# Markers match package path segments or module file names. A sample goes to the
+# category of its innermost frame with a marker, so our own code called back by
+# crewai counts as app, and a print inside a crewai event handler as stdout.
+# Within one frame, categories are checked in order.
+SAMPLE_CATEGORIES = [
+    ("llm_wait", tuple(map(_package, ("litellm", "httpx", "httpcore", "urllib3", "requests", "anthropic", "openai")))
+     + (f"{os.sep}ssl.py", f"{os.sep}socket.py", f"{os.sep}stub_llm.py")),
+    ("stdout", (_package("rich"), f"{os.sep}printer.py", f"{os.sep}console_formatter.py")),
+    ("framework", tuple(map(_package, ("crewai", "pydantic", "pydantic_core", "instructor", "jinja2", "opentelemetry")))),
+    ("app", (_package("expert_panel_assistant"),)),
+]
+
+_active_profiler: Optional["Profiler"] = None
+
+
+@dataclass
+class StageStats:
+    """Wall time and memory for one profiled stage."""
+    wall_seconds: float = 0.0
+    net_bytes: int = 0
+    peak_bytes: int = 0
+    calls: int = 0
+
+
+@contextmanager
+def profile_stage(name: str) -> Iterator[None]:
+    """
+    Mark a block of code as a named stage for the active profiler.
+    Does nothing when no profiler is running, so it is safe on the normal hot path.
+    """
+    if _active_profiler is None:
+        yield
+        return
+    with _active_profiler.stage(name):
+        yield
+
+
+def _frame_label(code) -> str:
+    parts = code.co_filename.replace("\\", "/").split("/")
+    return f"{code.co_name} ({'/'.join(parts[-2:])})".replace(";", ",")
+
+
+def _categorize(filenames: List[str]) -> str:
+    """Categorize a sampled stack given its frames' file names, outermost first."""
+    for filename in reversed(filenames):
+        for category, markers in SAMPLE_CATEGORIES:
+            if any(marker in filename for marker in markers):
+                return category
+    return "other"
+
+
+class Profiler:
+    """
+    Sampling CPU profiler with per-stage tracemalloc accounting.
+    Samples only the thread that called start(), which is where crewai runs a sequential crew.
+    Stages should not be nested.
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, tracemalloc_frames: int = 1):
+        self.interval = interval
+        self.tracemalloc_frames = tracemalloc_frames
+        self.stacks: Counter = Counter()
+        self.categories: Counter = Counter()
+        self.stage_categories: Dict[str, Counter] = {}
+        self.stages: Dict[str, StageStats] = {}
+        self.current_stage = "untracked"
+        self.wall_seconds = 0.0
+        self.samples = 0
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._stop_event = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._target_thread = 0
+        self._started_at = 0.0
+
+    def start(self) -> None:
+        global _active_profiler
+        if _active_profiler is not None:
+            raise RuntimeError("A profiler is already running")
+        _active_profiler = self
+
+        tracemalloc.start(self.tracemalloc_frames)
+        self._target_thread = threading.get_ident()
+        self._started_at = time.perf_counter()
+        self._stop_event.clear()
+        self._sampler = threading.Thread(target=self._sample_loop, name="profiler-sampler", daemon=True)
+        self._sampler.start()
+
+    def stop(self) -> None:
+        global _active_profiler
+        self._stop_event.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        self.wall_seconds = time.perf_counter() - self._started_at
+        self._snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, threading.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+        tracemalloc.stop()
+        _active_profiler = None
+
+    def __enter__(self) -> "Profiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Attribute samples, wall time and allocations inside the block to stage name."""
+        stats = self.stages.setdefault(name, StageStats())
+        previous_stage, self.current_stage = self.current_stage, name
+        start_bytes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats.wall_seconds += time.perf_counter() - start
+            end_bytes, peak_bytes = tracemalloc.get_traced_memory()
+            stats.net_bytes += end_bytes - start_bytes
+            stats.peak_bytes = max(stats.peak_bytes, peak_bytes - start_bytes)
+            stats.calls += 1
+            self.current_stage = previous_stage
+
+    def _sample_loop(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self._target_thread)
+            if frame is None:
+                continue
+
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            codes.reverse()
+
+            stage = self.current_stage
+            category = _categorize([code.co_filename for code in codes])
+            self.stacks[(stage,) + tuple(_frame_label(code) for code in codes)] += 1
+            self.categories[category] += 1
+            self.stage_categories.setdefault(stage, Counter())[category] += 1
+            self.samples += 1
+
+    def write_collapsed_stacks(self, path: str) -> None:
+        """Write samples in collapsed-stack format, rooted at the stage name."""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{';'.join(stack)} {count}\n")
+
+    def hotspots(self, limit: int = 15) -> List[Tuple[str, int, int]]:
+        """Top functions as (frame, self samples, inclusive samples), by self samples."""
+        self_samples: Counter = Counter()
+        inclusive_samples: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack[1:]
+            if frames:
+                self_samples[frames[-1]] += count
+            for label in set(frames):
+                inclusive_samples[label] += count
+        return [(label, count, inclusive_samples[label]) for label, count in self_samples.most_common(limit)]
+
+    def allocation_sites(self, limit: int = 10) -> List[Tuple[str, int, int]]:
+        """Top source lines by memory still allocated at stop, as (location, bytes, blocks)."""
+        if self._snapshot is None:
+            return []
+        return [
+            (str(stat.traceback), stat.size, stat.count)
+            for stat in self._snapshot.statistics("lineno")[:limit]
+        ]
+
+    def summary(self) -> str:
+        """Render the profiling summary tables as text."""
+        sample_ms = self.interval * 1000
+        lines = [
+            f"Profiled {self.wall_seconds:.2f}s wall time, {self.samples} samples every {sample_ms:g}ms",
+            "",
+            "STAGES",
+            f"{'stage':<22}{'calls':>6}{'wall (s)':>10}{'samples':>9}{'net alloc':>12}{'peak alloc':>12}",
+        ]
+        for name, stats in self.stages.items():
+            stage_samples = sum(self.stage_categories.get(name, Counter()).values())
+            lines.append(
+                f"{name:<22}{stats.calls:>6}{stats.wall_seconds:>10.2f}{stage_samples:>9}"
+                f"{_format_bytes(stats.net_bytes):>12}{_format_bytes(stats.peak_bytes):>12}"
+            )
+
+        lines += ["", "TIME BY CATEGORY", f"{'stage':<22}" + "".join(f"{c:>11}" for c, _ in SAMPLE_CATEGORIES) + f"{'other':>11}"]
+        for name, counts in self.stage_categories.items():
+            total = sum(counts.values()) or 1
+            cells = "".join(f"{counts[c] / total:>11.0%}" for c, _ in SAMPLE_CATEGORIES + [("other", ())])
+            lines.append(f"{name:<22}{cells}")
+        total = self.samples or 1
+        cells = "".join(f"{self.categories[c] / total:>11.0%}" for c, _ in SAMPLE_CATEGORIES + [("other", ())])
+        lines.append(f"{'all':<22}{cells}")
+
+        lines += ["", "HOTSPOTS (by self samples)", f"{'self':>7}{'incl':>7}  frame"]
+        for label, self_count, inclusive_count in self.hotspots():
+            lines.append(f"{self_count:>7}{inclusive_count:>7}  {label}")
+
+        lines += ["", "ALLOCATION SITES (still allocated at end)", f"{'bytes':>10}{'blocks':>8}  location"]
+        for location, size, count in self.allocation_sites():
+            lines.append(f"{_format_bytes(size):>10}{count:>8}  {location}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _format_bytes(size: int) -> str:
+    sign = "-" if size < 0 else ""
+    size = abs(size)
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{sign}{size:.0f}{unit}" if unit == "B" else f"{sign}{size:.1f}{unit}"
+        size /= 1024
+    return f"{sign}{size:.1f}GiB"
@@ -0,0 +1,131 @@
+"""
+Content-based expert routing for the Expert Panel Assistant.
+
+Pure-Python, LLM-free routing helpers. This module deliberately does not
+import crewai so it can be used from worker processes for bulk routing.
+"""
+import re
+from typing import Dict, List
+
+EXPERT_NAMES = ["simon_sinek", "julie_zhuo", "satya_nadella", "roger_martin", "chris_voss"]
+
+DEFAULT_EXPERTS = ["simon_sinek", "julie_zhuo", "roger_martin"]
+
+MAX_EXPERTS = 3
+
+# Keyword mapping for expert selection
+EXPERT_KEYWORDS = {
+    "simon_sinek": ["leadership", "vision", "purpose", "inspire", "motivation", "culture", "values", "why"],
+    "julie_zhuo": ["team", "scaling", "management", "growth", "dynamics", "communication", "people", "hiring"],
+    "satya_nadella": ["transformation", "innovation", "technology", "digital", "cloud", "ai", "partnership", "enterprise"],
+    "roger_martin": ["strategy", "market", "competition", "positioning", "investment", "growth", "decision", "analysis"],
+    "chris_voss": ["negotiation", "deal", "agreement", "conflict", "persuasion", "pricing", "customer", "partnership"]
+}
+
+# Keywords shared by several experts ("growth", "partnership") are only searched for once
+_ALL_KEYWORDS = sorted({keyword for keywords in EXPERT_KEYWORDS.values() for keyword in keywords})
+
+
+def parse_expert_names(router_result: str) -> List[str]:
+    """
+    Parse expert names from the router result output.
+    Expected format: Contains expert names like "simon_sinek", "julie_zhuo", etc.
+    """
+    # Define all possible expert names
+    expert_names = EXPERT_NAMES
+
+    # Convert result to lowercase for matching
+    result_lower = str(router_result).lower()
+
+    selected_experts = []
+    for name in expert_names:
+        # Check for various formats: "simon_sinek", "Simon Sinek", "simon sinek"
+        name_variants = [
+            name,
+            name.replace("_", " "),
+            name.replace("_", "").replace(" ", ""),
+            " ".join(word.capitalize() for word in name.split("_"))
+        ]
+
+        if any(variant.lower() in result_lower for variant in name_variants):
+            selected_experts.append(name)
+
+    # Fallback: if no experts found, try regex pattern matching
+    if not selected_experts:
+        # Look for patterns like "Selected experts: name1, name2, name3"
+        patterns = [
+            r'selected[^:]*:\s*([^.]+)',
+            r'experts?[^:]*:\s*([^.]+)',
+            r'recommend[^:]*:\s*([^.]+)',
+            r'relevant[^:]*:\s*([^.]+)'
+        ]
+
+        for pattern in patterns:
+            match = re.search(pattern, result_lower, re.IGNORECASE)
+            if match:
+                matched_text = match.group(1)
+                for name in expert_names:
+                    if any(variant.lower() in matched_text for variant in [
+                        name,
+                        name.replace("_", " "),
+                        " ".join(word.capitalize() for word in name.split("_"))
+                    ]):
+                        if name not in selected_experts:
+                            selected_experts.append(name)
+                break
+
+    # Limit to maximum 3 experts as per requirements
+    selected_experts = selected_experts[:MAX_EXPERTS]
+
+    # If still no experts found, default to a reasonable selection
+    if not selected_experts:
+        print("⚠️  Could not parse expert selection from router output. Using default experts.")
+        selected_experts = list(DEFAULT_EXPERTS)
+
+    return selected_experts
+
+
+def expert_topic_keywords(email_content: str) -> Dict[str, List[str]]:
+    """
+    Map each expert to the keywords from its area that appear in the email.
+    Used both for routing scores and for detecting topic changes in a thread.
+    """
+    content_lower = email_content.lower()
+    found = {keyword for keyword in _ALL_KEYWORDS if keyword in content_lower}
+    return {
+        expert: [keyword for keyword in keywords if keyword in found]
+        for expert, keywords in EXPERT_KEYWORDS.items()
+    }
+
+
+def score_experts(email_content: str) -> Dict[str, int]:
+    """Score every expert by the number of its keywords found in the email."""
+    return {expert: len(keywords) for expert, keywords in expert_topic_keywords(email_content).items()}
+
+
+def select_experts(expert_scores: Dict[str, int]) -> List[str]:
+    """
+    Select the top 3 experts with a non-zero score, highest first (ties keep panel order).
+    Returns an empty list when no keywords matched.
+    """
+    sorted_experts = sorted(
+        ((expert, score) for expert, score in expert_scores.items() if score > 0),
+        key=lambda x: x[1],
+        reverse=True
+    )
+    return [expert for expert, score in sorted_experts[:MAX_EXPERTS]]
+
+
+def simple_content_routing(email_content: str) -> List[str]:
+    """
+    Simple content-based routing to select appropriate experts.
+    This analyzes keywords in the email to determine relevance.
+    """
+    selected_experts = select_experts(score_experts(email_content))
+
+    # If no keywords matched, use default experts
+    if not selected_experts:
+        print("⚠️  No specific expertise keywords found. Using balanced expert panel.")
+        selected_experts = list(DEFAULT_EXPERTS)
+
+    return selected_experts
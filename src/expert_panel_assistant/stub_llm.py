@@ -0,0 +1,64 @@
+"""
+Offline stand-in LLM for profiling and dry runs.
+
+Selected with LLM_MODEL=stub. Returns canned answers shaped like the ones
+each panel task expects, after an optional simulated latency
+(STUB_LLM_LATENCY, seconds), so the crewai orchestration around the LLM can
+be exercised and profiled without network access or API keys.
+"""
+import os
+import time
+from typing import Any, Dict, List, Optional, Union
+
+from crewai.llms.base_llm import BaseLLM
+
+_EXPERT_ANSWER = (
+    "Clarify the decision you need to make first, then align the people who own it "
+    "around a short list of measurable outcomes. Revisit the plan after 30 days."
+)
+
+
+class StubLLM(BaseLLM):
+    """Canned-response LLM that never leaves the process."""
+
+    def __init__(self, model: str = "stub", temperature: Optional[float] = None, latency: Optional[float] = None):
+        super().__init__(model=model, temperature=temperature)
+        self.latency = float(os.getenv("STUB_LLM_LATENCY", "0")) if latency is None else latency
+
+    def call(
+        self,
+        messages: Union[str, List[Dict[str, str]]],
+        tools: Optional[List[dict]] = None,
+        callbacks: Optional[List[Any]] = None,
+        available_functions: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+
+        prompt = messages if isinstance(messages, str) else "\n".join(str(m.get("content", "")) for m in messages)
+        return f"Thought: I now can give a great answer\nFinal Answer: {self._answer(prompt)}"
+
+    @staticmethod
+    def _answer(prompt: str) -> str:
+        """Pick a canned answer matching the task the prompt belongs to."""
+        if "Review the synthesized response" in prompt:
+            return "APPROVED"
+        if "executive summary of the expert responses" in prompt:
+            return "Align leadership on the decision, then scale communication around clear outcomes."
+        if "Compile all expert responses" in prompt:
+            return f"## 🎯 Key Insights from Expert Panel\n\n**Executive Summary:** {_EXPERT_ANSWER}"
+        if "Respond in exactly this format" in prompt:
+            return f"INSIGHT: {_EXPERT_ANSWER}\nKEY ACTIONS:\n- Name the decision owner\n- Review progress in 30 days"
+        if "determine if it falls within your area of expertise" in prompt:
+            return "RELEVANT - this touches on my area of expertise."
+        return _EXPERT_ANSWER
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+    def supports_stop_words(self) -> bool:
+        return False
+
+    def get_context_window_size(self) -> int:
+        return 8192
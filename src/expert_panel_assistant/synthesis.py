@@ -0,0 +1,131 @@
+"""
+Deterministic template synthesis for the Expert Panel Assistant.
+
+Instead of asking the router agent to reformat expert answers into the
+panel layout, the reply is assembled locally from structured expert output.
+The LLM is only used for a short executive summary ("fast" mode) or not at
+all ("template" mode).
+"""
+import os
+import random
+import re
+from typing import Dict, List, Optional, Tuple
+
+SYNTHESIS_MODES = ("llm", "fast", "template")
+
+EXPERT_FORMATTING = {
+    "simon_sinek": ("🧭", "Leadership & Vision"),
+    "julie_zhuo": ("👥", "Team Dynamics & Scaling"),
+    "satya_nadella": ("🚀", "Transformation & Innovation"),
+    "roger_martin": ("📈", "Strategy & Market Positioning"),
+    "chris_voss": ("🤝", "Negotiation & Persuasion")
+}
+
+# Expected output for expert responses when synthesis is done from the template
+STRUCTURED_RESPONSE_FORMAT = """
+Respond in exactly this format:
+INSIGHT: <your main insight and recommendation in 2-4 sentences>
+KEY ACTIONS:
+- <specific actionable item>
+- <specific actionable item>
+"""
+
+PANEL_FOOTER = (
+    "*This response was generated by our Expert Advisory Panel. For follow-up questions or "
+    "deeper discussion on any of these areas, please let us know.*"
+)
+
+# Labels must start a line; markdown emphasis around them ("**Insight:**") is tolerated
+_INSIGHT_LABEL = re.compile(r"^[^\w\n]*insight[ \t*_]*:[ \t*_]*", re.IGNORECASE | re.MULTILINE)
+_ACTIONS_LABEL = re.compile(r"^[^\w\n]*key actions[ \t*_]*:[ \t*_]*", re.IGNORECASE | re.MULTILINE)
+_BULLET_PATTERN = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+(.*\S)\s*$")
+
+
+def get_synthesis_mode() -> str:
+    """
+    Get the synthesis mode from the SYNTHESIS_MODE environment variable.
+    Unknown values fall back to "llm", the original full LLM synthesis.
+    """
+    mode = os.getenv("SYNTHESIS_MODE", "llm").strip().lower()
+    return mode if mode in SYNTHESIS_MODES else "llm"
+
+
+def get_quality_review_rate() -> float:
+    """Get the fraction of panel runs that get an LLM quality review (QUALITY_REVIEW_RATE, default 1.0)."""
+    try:
+        rate = float(os.getenv("QUALITY_REVIEW_RATE", "1.0"))
+    except ValueError:
+        return 1.0
+    return min(max(rate, 0.0), 1.0)
+
+
+def should_review(rate: Optional[float] = None) -> bool:
+    """Decide whether this run is sampled for quality review."""
+    rate = get_quality_review_rate() if rate is None else rate
+    return rate >= 1.0 or random.random() < rate
+
+
+def expert_display_name(expert_name: str) -> str:
+    """Turn an expert key like "simon_sinek" into "Simon Sinek"."""
+    return " ".join(word.capitalize() for word in expert_name.split("_"))
+
+
+def parse_expert_output(text: str) -> Tuple[str, List[str]]:
+    """
+    Split an expert response into its insight and key actions.
+    Responses that do not follow STRUCTURED_RESPONSE_FORMAT are kept whole
+    as the insight, with any bullet lines used as the actions. Bullet lines
+    never appear in the insight, so an action is not rendered twice.
+    """
+    text = str(text).strip()
+
+    actions_label = _ACTIONS_LABEL.search(text)
+    action_block = text[actions_label.end():] if actions_label else text
+    actions = [m.group(1) for m in map(_BULLET_PATTERN.match, action_block.splitlines()) if m]
+
+    insight_label = _INSIGHT_LABEL.search(text)
+    if insight_label:
+        end = actions_label.start() if actions_label and actions_label.start() >= insight_label.end() else len(text)
+        body = text[insight_label.end():end]
+    else:
+        body = text[:actions_label.start()] if actions_label else text
+    insight = "\n".join(line for line in body.splitlines() if not _BULLET_PATTERN.match(line))
+
+    return " ".join(insight.split()).strip("*_ "), actions
+
+
+def render_panel_response(expert_responses: Dict[str, str], executive_summary: Optional[str] = None) -> str:
+    """
+    Render expert responses into the panel's markdown reply layout.
+    Immediate actions are the first key action of each expert; strategic
+    initiatives are the remaining ones.
+    """
+    sections = ["## 🎯 Key Insights from Expert Panel", ""]
+    if executive_summary:
+        sections += [f"**Executive Summary:** {' '.join(str(executive_summary).split())}", ""]
+    sections += ["---", ""]
+
+    immediate_actions, strategic_initiatives = [], []
+    for expert_name, response in expert_responses.items():
+        emoji, title = EXPERT_FORMATTING.get(expert_name, ("💡", "Expert Insights"))
+        insight, actions = parse_expert_output(response)
+
+        sections += [f"### {emoji} {expert_display_name(expert_name)} on {title}", f"*{insight}*", ""]
+        if actions:
+            sections += ["**Key Actions:**"] + [f"- {action}" for action in actions] + [""]
+            immediate_actions.append(actions[0])
+            strategic_initiatives.extend(actions[1:])
+        sections += ["---", ""]
+
+    if immediate_actions or strategic_initiatives:
+        sections += ["## 🎯 Integrated Recommendations", ""]
+        if immediate_actions:
+            sections += ["**Immediate Actions (Next 30 Days):**"]
+            sections += [f"{i}. {action}" for i, action in enumerate(immediate_actions, 1)] + [""]
+        if strategic_initiatives:
+            sections += ["**Strategic Initiatives (Next Quarter):**"]
+            sections += [f"{i}. {action}" for i, action in enumerate(strategic_initiatives, 1)] + [""]
+        sections += ["---", ""]
+
+    sections.append(PANEL_FOOTER)
+    return "\n".join(sections) + "\n"
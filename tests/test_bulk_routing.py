@@ -0,0 +1,49 @@
+import json
+
+from expert_panel_assistant.bulk_routing import route_shard, run_bulk_routing
+from expert_panel_assistant.routing import EXPERT_NAMES, simple_content_routing
+
+CORPUS = [
+    {"id": "pricing", "email": "Subject: Negotiation on pricing deal\nFrom: a@example.com\n\nHi panel, thoughts on our team?"},
+    {"id": "reply", "email": "Subject: Re: Scaling\n\nWhat about our vision?\n\n> How do we hire managers for the team?"},
+    {"id": "plain", "email": "How should we transform our culture with AI and cloud?"},
+    {"id": "none", "email": "Subject: Lunch\n\nWhere should we eat on Friday?"},
+    "Our strategy and market positioning need a rethink before the board meeting.",
+]
+
+
+def write_corpus(tmp_path):
+    path = tmp_path / "emails.jsonl"
+    path.write_text("".join(json.dumps(record) + "\n" for record in CORPUS), encoding="utf-8")
+    return path
+
+
+def decode(mask):
+    return [expert for i, expert in enumerate(EXPERT_NAMES) if mask & (1 << i)]
+
+
+def live_routes():
+    return [simple_content_routing(r["email"] if isinstance(r, dict) else r) for r in CORPUS]
+
+
+def test_route_shard_matches_live_routing(tmp_path):
+    path = write_corpus(tmp_path)
+    shard_dir = tmp_path / "shard"
+
+    result = route_shard((str(path), 0, path.stat().st_size, str(shard_dir)))
+    selected = (shard_dir / "selected.u8").read_bytes()
+
+    assert result["rows"] == len(CORPUS)
+    assert [sorted(decode(mask)) for mask in selected] == [sorted(experts) for experts in live_routes()]
+
+
+def test_run_bulk_routing_keeps_corpus_order(tmp_path):
+    path = write_corpus(tmp_path)
+    output_dir = tmp_path / "routing_results"
+
+    summary = run_bulk_routing(str(path), str(output_dir), workers=2)
+    selected = (output_dir / "selected.u8").read_bytes()
+
+    assert summary["rows"] == len(CORPUS)
+    assert [sorted(decode(mask)) for mask in selected] == [sorted(experts) for experts in live_routes()]
+    assert (output_dir / "id.txt").read_text(encoding="utf-8").splitlines()[:4] == ["pricing", "reply", "plain", "none"]
@@ -0,0 +1,47 @@
+from expert_panel_assistant.checkpoints import CheckpointLog
+
+
+def test_replay_restores_progress(tmp_path):
+    path = str(tmp_path / "checkpoints.jsonl")
+    log = CheckpointLog(path)
+    record = log.recorder("email-1")
+    record("synthesis_mode", None, "fast")
+    record("assessment", "simon_sinek", "RELEVANT")
+    record("response", "simon_sinek", "INSIGHT: Start with why.")
+    log.record("email-2", "done", "reply")
+
+    replayed = CheckpointLog(path)
+    progress = replayed.progress("email-1")
+
+    assert progress.synthesis_mode == "fast"
+    assert progress.assessments == {"simon_sinek": "RELEVANT"}
+    assert progress.responses == {"simon_sinek": "INSIGHT: Start with why."}
+    assert progress.summary is None
+    assert not replayed.is_done("email-1")
+    assert replayed.is_done("email-2")
+
+
+def test_truncated_tail_is_ignored_and_next_entry_survives(tmp_path):
+    path = tmp_path / "checkpoints.jsonl"
+    CheckpointLog(str(path)).record("email-1", "response", "Hire leads first.", "julie_zhuo")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"email_id": "email-1", "stage": "summ')
+
+    log = CheckpointLog(str(path))
+    assert log.progress("email-1").summary is None
+
+    log.record("email-1", "summary", "Lead with purpose.")
+    replayed = CheckpointLog(str(path))
+
+    assert replayed.progress("email-1").responses == {"julie_zhuo": "Hire leads first."}
+    assert replayed.progress("email-1").summary == "Lead with purpose."
+
+
+def test_mode_conflicts_only_report_unfinished_emails(tmp_path):
+    log = CheckpointLog(str(tmp_path / "checkpoints.jsonl"))
+    log.record("email-1", "synthesis_mode", "llm")
+    log.record("email-2", "synthesis_mode", "llm")
+    log.record("email-2", "done", "reply")
+    log.record("email-3", "synthesis_mode", "fast")
+
+    assert log.mode_conflicts("fast") == {"email-1": "llm"}
@@ -0,0 +1,157 @@
+from expert_panel_assistant.conversation_state import (
+    ConversationStore,
+    ExpertTurn,
+    ThreadState,
+    extract_new_message,
+    parse_email_headers,
+)
+
+FIRST_EMAIL = "Message-ID: <a@example.com>\nSubject: Team scaling\n\nHow do we scale our team and leadership?"
+
+
+def make_thread() -> ThreadState:
+    return ThreadState(
+        thread_id="<a@example.com>",
+        subject="team scaling",
+        message_ids=["<a@example.com>"],
+        experts=["julie_zhuo", "simon_sinek"],
+        turns={
+            "julie_zhuo": ExpertTurn(response="Hire leads first.", summary="Hire leads first.", topics=["scaling", "team"]),
+            "simon_sinek": ExpertTurn(response="Start with why.", summary="Start with why.", topics=["leadership"]),
+        },
+    )
+
+
+def test_follow_up_without_keywords_reruns_every_expert():
+    thread = make_thread()
+    new_message = "Thanks. What timeline should we use for next steps?"
+
+    assert thread.unchanged_experts(new_message, {"julie_zhuo": [], "simon_sinek": []}) == {}
+
+
+def test_follow_up_with_only_covered_keywords_reuses_that_expert():
+    thread = make_thread()
+    new_message = "Any more thoughts on the team?"
+
+    unchanged = thread.unchanged_experts(new_message, {"julie_zhuo": ["team"], "simon_sinek": []})
+
+    assert unchanged == {"julie_zhuo": "Hire leads first."}
+
+
+def test_follow_up_with_new_keyword_reruns_expert():
+    thread = make_thread()
+
+    unchanged = thread.unchanged_experts("What about hiring for the team?", {"julie_zhuo": ["team", "hiring"]})
+
+    assert "julie_zhuo" not in unchanged
+
+
+def test_follow_up_with_no_new_text_reuses_every_expert():
+    thread = make_thread()
+    new_message = extract_new_message("Subject: Re: Team scaling\n\n> How do we scale our team?")
+
+    assert new_message == ""
+    assert set(thread.unchanged_experts(new_message, {})) == {"julie_zhuo", "simon_sinek"}
+
+
+def test_find_thread_by_reply_headers(tmp_path):
+    store = ConversationStore(str(tmp_path / "state.json"))
+    store.record_turn(FIRST_EMAIL, ["julie_zhuo"], {"julie_zhuo": "Hire leads first."}, {"julie_zhuo": ["team"]})
+    store.save()
+
+    reloaded = ConversationStore(str(tmp_path / "state.json"))
+    reply = "Message-ID: <b@example.com>\nIn-Reply-To: <a@example.com>\nSubject: Something else\n\nMore?"
+
+    assert reloaded.find_thread(reply).thread_id == "<a@example.com>"
+
+
+def test_subject_fallback_only_matches_replies(tmp_path):
+    store = ConversationStore(str(tmp_path / "state.json"))
+    store.record_turn("Subject: Quick question\n\nHow do we price this deal?", ["chris_voss"], {"chris_voss": "Anchor high."}, {})
+
+    assert store.find_thread("Subject: Quick question\n\nShould we hire a designer?") is None
+    assert store.find_thread("Subject: RE: Quick question\n\nAnd the discount?") is not None
+
+
+def test_body_line_shaped_like_header_is_kept():
+    email = "Question: how do we handle pricing?\nMore text"
+
+    assert parse_email_headers(email) == {}
+    assert extract_new_message(email) == email
+
+
+def test_header_block_needs_blank_line_and_known_header():
+    assert parse_email_headers("Subject: Pricing\nFrom: a@example.com\n\nHi panel") == {
+        "subject": "Pricing",
+        "from": "a@example.com",
+    }
+    assert parse_email_headers("Note: pricing\nGoal: growth\n\nHi panel") == {}
+    assert extract_new_message("Subject: Pricing\n\nHi panel,\n> old text") == "Hi panel,"
+
+
+def test_unthreadable_email_is_not_persisted(tmp_path):
+    store = ConversationStore(str(tmp_path / "state.json"))
+
+    thread = store.record_turn("How do we scale the team?", ["julie_zhuo"], {"julie_zhuo": "Hire leads."}, {})
+    store.save()
+
+    assert thread is None
+    assert ConversationStore(str(tmp_path / "state.json")).threads == {}
+
+
+def test_folded_references_header_finds_thread(tmp_path):
+    store = ConversationStore(str(tmp_path / "state.json"))
+    store.record_turn(FIRST_EMAIL, ["julie_zhuo"], {"julie_zhuo": "Hire leads first."}, {"julie_zhuo": ["team"]})
+    reply = (
+        "Message-ID: <c@example.com>\n"
+        "References: <a@example.com>\n"
+        "    <b@example.com>\n"
+        "Subject: Something else\n\n"
+        "And the managers?"
+    )
+
+    assert parse_email_headers(reply)["references"] == "<a@example.com> <b@example.com>"
+    assert store.find_thread(reply).thread_id == "<a@example.com>"
+    assert extract_new_message(reply) == "And the managers?"
+
+
+def test_header_name_with_digits_keeps_header_block(tmp_path):
+    store = ConversationStore(str(tmp_path / "state.json"))
+    store.record_turn(FIRST_EMAIL, ["julie_zhuo"], {"julie_zhuo": "Hire leads first."}, {"julie_zhuo": ["team"]})
+    reply = (
+        "Message-ID: <c@example.com>\n"
+        "In-Reply-To: <a@example.com>\n"
+        "Subject: Re: Team scaling\n"
+        "X-MS-Office365-Filtering-Correlation-Id: 1234\n\n"
+        "What about hiring?"
+    )
+
+    assert parse_email_headers(reply)["in-reply-to"] == "<a@example.com>"
+    assert store.find_thread(reply).thread_id == "<a@example.com>"
+    assert extract_new_message(reply) == "What about hiring?"
+
+
+def test_outlook_quoted_history_is_not_new_text():
+    thread = make_thread()
+    divider_reply = (
+        "Subject: RE: Team scaling\n\n"
+        "What timeline should we use?\n\n"
+        "________________________________\n"
+        "From: Panel <panel@example.com>\n"
+        "Sent: Monday, March 3, 2025 9:00 AM\n"
+        "Subject: Team scaling\n\n"
+        "How do we scale the team?"
+    )
+    bare_reply = divider_reply.replace("________________________________\n", "")
+
+    for reply in (divider_reply, bare_reply):
+        new_message = extract_new_message(reply)
+
+        assert new_message == "What timeline should we use?"
+        assert thread.unchanged_experts(new_message, {"julie_zhuo": [], "simon_sinek": []}) == {}
+
+
+def test_from_line_without_sent_or_date_is_body_text():
+    email = "Subject: Pricing\n\nFrom: our sales lead's notes\nWe keep discounting too early."
+
+    assert extract_new_message(email) == "From: our sales lead's notes\nWe keep discounting too early."
@@ -0,0 +1,53 @@
+import pytest
+
+from expert_panel_assistant.crew import ExpertPanelAssistant
+
+
+@pytest.fixture
+def expert_panel(monkeypatch):
+    monkeypatch.setenv("LLM_MODEL", "stub")
+    monkeypatch.setenv("CREWAI_TESTING", "true")
+    return ExpertPanelAssistant()
+
+
+def test_fast_mode_summarizes_restored_responses(expert_panel):
+    restored = {"simon_sinek": "INSIGHT: Start with why.", "julie_zhuo": "INSIGHT: Hire leads first."}
+
+    crew = expert_panel.create_dynamic_crew(
+        ["simon_sinek", "julie_zhuo"],
+        synthesis_mode="fast",
+        restored_responses=restored,
+        review=False,
+    )
+
+    assert crew.tasks == [expert_panel._summary_task]
+    assert "already completed for this email" in crew.tasks[0].description
+    assert "Start with why." in crew.tasks[0].description
+    assert "still current" not in crew.tasks[0].description
+
+
+def test_fast_mode_summary_includes_skipped_and_fresh_experts(expert_panel):
+    crew = expert_panel.create_dynamic_crew(
+        ["simon_sinek", "julie_zhuo"],
+        synthesis_mode="fast",
+        reused_responses={"simon_sinek": "INSIGHT: Start with why."},
+        review=False,
+    )
+
+    summary_task = expert_panel._summary_task
+    assert summary_task is crew.tasks[-1]
+    assert "still current" in summary_task.description
+    assert summary_task.context == [expert_panel._response_tasks["julie_zhuo"]]
+
+
+def test_checkpointed_summary_is_not_rerun(expert_panel):
+    crew = expert_panel.create_dynamic_crew(
+        ["simon_sinek"],
+        synthesis_mode="fast",
+        restored_responses={"simon_sinek": "INSIGHT: Start with why."},
+        executive_summary="Lead with purpose.",
+        review=False,
+    )
+
+    assert crew.tasks == []
+    assert "Lead with purpose." in expert_panel.assemble_template_response({}, output_file="/dev/null")
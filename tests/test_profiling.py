@@ -0,0 +1,58 @@
+import os
+import time
+
+from expert_panel_assistant.profiling import Profiler, _categorize, profile_stage
+
+SITE = os.path.join(os.sep, "venv", "lib", "site-packages")
+APP = os.path.join(os.sep, "repo", "src", "expert_panel_assistant", "main.py")
+CHECKPOINTS = os.path.join(os.sep, "repo", "src", "expert_panel_assistant", "checkpoints.py")
+CREWAI = os.path.join(SITE, "crewai", "task.py")
+EVENT_LISTENER = os.path.join(SITE, "crewai", "events", "event_listener.py")
+RICH = os.path.join(SITE, "rich", "console.py")
+
+
+def test_package_markers_match_path_segments_only():
+    requests_lookalike = os.path.join(os.sep, "repo", "src", "handle_requests.py")
+    openai_lookalike = os.path.join(SITE, "crewai", "llms", "openai_compat.py")
+
+    assert _categorize([APP, requests_lookalike]) == "app"
+    assert _categorize([APP, openai_lookalike]) == "framework"
+    assert _categorize([APP, CREWAI, os.path.join(SITE, "litellm", "main.py")]) == "llm_wait"
+
+
+def test_innermost_marked_frame_decides_category():
+    stdlib = os.path.join(os.sep, "usr", "lib", "python3.11", "json", "encoder.py")
+
+    assert _categorize([APP, CREWAI, EVENT_LISTENER, RICH]) == "stdout"
+    assert _categorize([APP, CREWAI, EVENT_LISTENER]) == "framework"
+    assert _categorize([APP, RICH] + [CREWAI] * 5) == "framework"
+    assert _categorize([APP, CREWAI, CHECKPOINTS, stdlib]) == "app"
+    assert _categorize([stdlib]) == "other"
+
+
+def busy_work(seconds):
+    total, deadline = 0, time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        total += sum(range(200))
+    return total
+
+
+def test_profiler_records_stage_rooted_stacks(tmp_path):
+    folded = tmp_path / "profile.folded"
+
+    with Profiler(interval=0.001) as profiler:
+        with profile_stage("busy"):
+            busy_work(0.2)
+    profiler.write_collapsed_stacks(str(folded))
+
+    lines = folded.read_text(encoding="utf-8").splitlines()
+    stats = profiler.stages["busy"]
+
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert stack.split(";")[0] in ("busy", "untracked") and int(count) > 0
+    busy_lines = [line for line in lines if "busy_work (" in line]
+    assert busy_lines and all(line.startswith("busy;") for line in busy_lines)
+    assert stats.calls == 1
+    assert stats.wall_seconds >= 0.2
+    assert profiler.samples == sum(profiler.categories.values())
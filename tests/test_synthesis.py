@@ -0,0 +1,31 @@
+from expert_panel_assistant.synthesis import parse_expert_output, render_panel_response
+
+
+def test_parse_structured_output():
+    text = "INSIGHT: Start with why. Then align.\nKEY ACTIONS:\n- Write the purpose\n- Share it weekly"
+
+    assert parse_expert_output(text) == ("Start with why. Then align.", ["Write the purpose", "Share it weekly"])
+
+
+def test_parse_markdown_labelled_output():
+    text = "**Insight:** Great.\n\n**Key Actions:**\n- Do a\n- Do b"
+
+    assert parse_expert_output(text) == ("Great.", ["Do a", "Do b"])
+
+
+def test_parse_insight_without_actions_label_keeps_bullets_out_of_insight():
+    assert parse_expert_output("INSIGHT: foo\n- a\n- b") == ("foo", ["a", "b"])
+
+
+def test_parse_free_form_output_is_kept_whole():
+    text = "Plain paragraph. Key insight: teams need clarity.\n- a"
+
+    assert parse_expert_output(text) == ("Plain paragraph. Key insight: teams need clarity.", ["a"])
+
+
+def test_render_does_not_double_emphasis():
+    response = render_panel_response({"simon_sinek": "**Insight:** Great.\n**Key Actions:**\n- Do a"})
+
+    assert "*Great.*" in response
+    assert "***" not in response
+    assert "### 🧭 Simon Sinek on Leadership & Vision" in response